@@ -1,14 +1,29 @@
 import sys
+import os
+import csv
 import json
-from datetime import datetime, timedelta
+import heapq
+import time
+import hashlib
+import tempfile
+import argparse
+import threading
+from bisect import bisect_left
+from functools import partial
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import date, datetime, timedelta
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTabWidget, QPushButton, QComboBox, QLabel, QTableWidget,
-    QTableWidgetItem, QLineEdit, QHeaderView, QFileDialog
+    QTableWidgetItem, QLineEdit, QHeaderView, QFileDialog, QDateEdit
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QDate
 import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 from bs4 import BeautifulSoup
 import re
 import pyqtgraph as pg
@@ -17,6 +32,834 @@ import warnings
 import calendar
 
 
+PERIOD_OPTIONS = ["Year", "Month", "Week", "ISO Week", "Date Range", "Last 7 Days", "Last 30 Days", "Last 90 Days"]
+ROLLING_WINDOWS = {"last 7 days": 7, "last 30 days": 30, "last 90 days": 90}
+CORRELATION_MAX_LAG = 4
+CORRELATION_PERMUTATIONS = 1000
+CORRELATION_MIN_PAIRS = 3
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+CATALOG_PATHS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_catalog.csv"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_catalog.json"),
+]
+CATALOG_MATCH_LIMIT = 5
+CATALOG_MIN_SCORE = 0.2
+INSIGHTS_TOP_K = 5
+INSIGHTS_PAGE_SIZE = 25
+# Reports at least this large (bytes) parse their usage table on a process pool
+DEFAULT_PARALLEL_PARSE_THRESHOLD = 8 * 1024 * 1024
+try:
+    PARALLEL_PARSE_THRESHOLD = int(os.environ.get("BATTERY_REPORT_PARALLEL_THRESHOLD",
+                                                  DEFAULT_PARALLEL_PARSE_THRESHOLD))
+except ValueError:
+    PARALLEL_PARSE_THRESHOLD = DEFAULT_PARALLEL_PARSE_THRESHOLD
+PARALLEL_PARSE_CHUNK_BYTES = 1024 * 1024
+USAGE_HEADING_PATTERN = re.compile(rb"Battery usage", re.I)
+TABLE_OPEN_PATTERN = re.compile(rb"<table[\s>]", re.I)
+TABLE_CLOSE_PATTERN = re.compile(rb"</table\s*>", re.I)
+ROW_OPEN_PATTERN = re.compile(rb"<tr[\s>]", re.I)
+COMPARISON_TICK_COUNT = 8
+SERVICE_PORT = 8765
+SERVICE_MAX_PENDING = 16
+SERVICE_CACHE_SIZE = 256
+SERVICE_TIMEOUT = 120
+SERVICE_LATENCY_WINDOW = 1000
+SERVICE_MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+
+
+class DailySeries:
+    # Per-day values keyed by date ordinal with a prefix-sum array, so any
+    # inclusive date range total is two binary searches and a subtraction.
+    def __init__(self, days, values):
+        self.days = np.asarray(days, dtype=np.int64)
+        self.prefix = np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=float))))
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def first_day(self):
+        return date.fromordinal(int(self.days[0])) if len(self.days) else None
+
+    @property
+    def last_day(self):
+        return date.fromordinal(int(self.days[-1])) if len(self.days) else None
+
+    def total(self, start, end):
+        lo = np.searchsorted(self.days, start.toordinal(), side='left')
+        hi = np.searchsorted(self.days, end.toordinal(), side='right')
+        return float(self.prefix[hi] - self.prefix[lo])
+
+    def rate(self, start, end):
+        # Per-day average over the part of the range the series covers; None if they don't overlap
+        if not len(self.days):
+            return None
+        first = max(start.toordinal(), int(self.days[0]))
+        last = min(end.toordinal(), int(self.days[-1]))
+        if last < first:
+            return None
+        return self.total(start, end) / (last - first + 1)
+
+
+def daily_degradation_series(health_data):
+    if len(health_data) < 2:
+        return DailySeries([], [])
+    ordinals = np.array([entry["date"].toordinal() for entry in health_data], dtype=np.int64)
+    healths = np.array([entry["health"] for entry in health_data], dtype=float)
+    spans = np.diff(ordinals)
+    drops = healths[:-1] - healths[1:]
+    mask = spans > 0
+    starts, spans, drops = ordinals[:-1][mask], spans[mask], drops[mask]
+    if not len(spans):
+        return DailySeries([], [])
+    # Spread each interval's drop evenly over its days
+    offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+    days = np.repeat(starts, spans) + offsets
+    values = np.repeat(drops / spans, spans)
+    return DailySeries(days, values)
+
+
+def daily_usage_series(usage_data):
+    if not usage_data:
+        return DailySeries([], [])
+    ordinals = np.array([entry["date"].toordinal() for entry in usage_data], dtype=np.int64)
+    hours = np.array([entry["hours_used"] for entry in usage_data], dtype=float)
+    days, inverse = np.unique(ordinals, return_inverse=True)
+    return DailySeries(days, np.bincount(inverse, weights=hours, minlength=len(days)))
+
+
+def degradation_intervals(health_data):
+    # Consecutive capacity-history intervals with their drop normalized per day
+    if len(health_data) < 2:
+        return None
+    dates = [entry["date"] for entry in health_data]
+    ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+    healths = np.array([entry["health"] for entry in health_data], dtype=float)
+    days = np.diff(ordinals)
+    keep = np.flatnonzero(days > 0)
+    drops = (healths[:-1] - healths[1:])[keep]
+    return {
+        "start": [dates[i] for i in keep],
+        "end": [dates[i + 1] for i in keep],
+        "days": days[keep],
+        "drop": drops,
+        "rate": drops / days[keep]
+    }
+
+
+def top_k_indices(values, k):
+    # Indices of the k largest values, largest first, partitioning instead of a full sort.
+    # Ties are broken by index so successive calls with a growing k extend the same ranking.
+    k = min(k, len(values))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    kth_value = np.partition(values, len(values) - k)[len(values) - k]
+    above = np.flatnonzero(values > kth_value)
+    tied = np.flatnonzero(values == kth_value)[:k - len(above)]
+    top = np.concatenate((above, tied))
+    return top[np.lexsort((top, -values[top]))]
+
+
+# Integer period indexes: Monday-aligned weeks (ordinal 1 is a Monday) and months since 1970
+PERIOD_INDEXERS = {
+    "week": lambda ordinals: (ordinals - 1) // 7,
+    "month": lambda ordinals: (ordinals - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64),
+}
+
+
+def calendar_period_extremes(series):
+    # Most/least week-of-month, month and year totals, labelled like the Degradation and Usage tabs
+    empty = (("N/A", 0), ("N/A", 0))
+    if not len(series):
+        return {"week": empty, "month": empty, "year": empty}
+    months = PERIOD_INDEXERS["month"](series.days)
+    first_of_month = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    days_to_monday = (7 - (first_of_month - 1) % 7) % 7
+    days_to_monday[days_to_monday == 0] = 7
+    # Same weeks as get_week_range: week 1 ends on the first Sunday, later weeks run Monday to Sunday
+    week_nums = (series.days - first_of_month + 7 - days_to_monday) // 7 + 1
+    labels = {
+        "week": lambda key: f"{key // 8 // 12 + 1970}-{key // 8 % 12 + 1:02d}-W{key % 8}",
+        "month": lambda key: f"{key // 12 + 1970}-{key % 12 + 1:02d}",
+        "year": lambda key: str(key + 1970)
+    }
+    indexes = {"week": months * 8 + week_nums, "month": months, "year": months // 12}
+    values = np.diff(series.prefix)
+    extremes = {}
+    for period, index in indexes.items():
+        keys, inverse = np.unique(index, return_inverse=True)
+        totals = np.bincount(inverse, weights=values, minlength=len(keys))
+        most, least = np.argmax(totals), np.argmin(totals)
+        extremes[period] = ((labels[period](int(keys[most])), float(totals[most])),
+                            (labels[period](int(keys[least])), float(totals[least])))
+    return extremes
+
+
+def period_totals(series, granularity):
+    if not len(series):
+        return np.array([], dtype=np.int64), np.array([], dtype=float)
+    periods, inverse = np.unique(PERIOD_INDEXERS[granularity](series.days), return_inverse=True)
+    return periods, np.bincount(inverse, weights=np.diff(series.prefix), minlength=len(periods))
+
+
+def rankdata(values):
+    # Average ranks for ties, as Spearman expects
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return ((ends - counts + ends + 1) / 2)[inverse]
+
+
+def permutation_correlation(x, y, permutations, rng):
+    x_centered = x - x.mean()
+    y_centered = y - y.mean()
+    denom = np.sqrt((x_centered @ x_centered) * (y_centered @ y_centered))
+    if denom == 0:
+        return float('nan'), float('nan')
+    correlation = (x_centered @ y_centered) / denom
+    # Shuffling keeps y's mean and norm, so every permuted coefficient shares the same denominator
+    shuffled = rng.permuted(np.tile(y_centered, (permutations, 1)), axis=1)
+    null_correlations = (shuffled @ x_centered) / denom
+    extreme = np.count_nonzero(np.abs(null_correlations) >= abs(correlation) - 1e-12)
+    return float(correlation), (extreme + 1) / (permutations + 1)
+
+
+def correlation_analysis(degradation_series, usage_series, max_lag=CORRELATION_MAX_LAG,
+                         permutations=CORRELATION_PERMUTATIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for granularity in PERIOD_INDEXERS:
+        deg_periods, deg_totals = period_totals(degradation_series, granularity)
+        usage_periods, usage_totals = period_totals(usage_series, granularity)
+        if not len(deg_periods) or not len(usage_periods):
+            continue
+
+        # Dense arrays over the shared period span; periods missing from either side stay NaN
+        first = min(deg_periods[0], usage_periods[0])
+        size = max(deg_periods[-1], usage_periods[-1]) - first + 1
+        degradation = np.full(size, np.nan)
+        usage = np.full(size, np.nan)
+        degradation[deg_periods - first] = deg_totals
+        usage[usage_periods - first] = usage_totals
+
+        for lag in range(min(max_lag, size - 1) + 1):
+            # Usage in period t against degradation in period t + lag
+            x = degradation[lag:]
+            y = usage[:size - lag]
+            mask = ~np.isnan(x) & ~np.isnan(y)
+            if np.count_nonzero(mask) < CORRELATION_MIN_PAIRS:
+                continue
+            x, y = x[mask], y[mask]
+            pearson, pearson_p = permutation_correlation(x, y, permutations, rng)
+            spearman, spearman_p = permutation_correlation(rankdata(x), rankdata(y), permutations, rng)
+            results.append({
+                "granularity": granularity,
+                "lag": lag,
+                "pairs": len(x),
+                "pearson": pearson,
+                "pearson_p": pearson_p,
+                "spearman": spearman,
+                "spearman_p": spearman_p
+            })
+    return results
+
+
+def normalize_model(text):
+    return " ".join(re.sub(r'[^0-9a-z]+', ' ', str(text).lower()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ReplacementCatalog:
+    # Offline replacement lookup: a trigram index for fuzzy model matching plus a
+    # sorted key list for prefix matches, both built once when the catalog loads.
+    def __init__(self, entries):
+        self.entries = [entry for entry in entries if entry.get("model")]
+        self.models = [normalize_model(entry["model"]) for entry in self.entries]
+        self.trigram_counts = np.array([len(trigrams(model)) for model in self.models], dtype=float)
+
+        postings = defaultdict(list)
+        for entry_id, model in enumerate(self.models):
+            for trigram in trigrams(model):
+                postings[trigram].append(entry_id)
+        self.trigram_index = {trigram: np.array(ids, dtype=np.int64) for trigram, ids in postings.items()}
+
+        makers = defaultdict(list)
+        for entry_id, entry in enumerate(self.entries):
+            maker = normalize_model(entry.get("manufacturer", ""))
+            if maker:
+                makers[maker].append(entry_id)
+        self.manufacturer_index = {maker: np.array(ids, dtype=np.int64) for maker, ids in makers.items()}
+        self.manufacturer_matches = {}
+
+        prefix_order = sorted(range(len(self.models)), key=lambda i: self.models[i])
+        self.prefix_keys = [self.models[i] for i in prefix_order]
+        self.prefix_ids = prefix_order
+        self.lookup_cache = {}
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            if file_path.lower().endswith('.json'):
+                entries = json.load(file)
+                if isinstance(entries, dict):
+                    if "batteries" not in entries:
+                        raise ValueError('JSON catalog object must have a "batteries" list')
+                    entries = entries["batteries"]
+                if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+                    raise ValueError("JSON catalog must be a list of battery objects")
+            else:
+                entries = list(csv.DictReader(file))
+        return cls([{key.strip().lower(): ("" if value is None else str(value)).strip()
+                     for key, value in entry.items() if key}
+                    for entry in entries])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, name, manufacturer="", limit=CATALOG_MATCH_LIMIT):
+        query = normalize_model(name)
+        cache_key = (query, normalize_model(manufacturer), limit)
+        if cache_key not in self.lookup_cache:
+            self.lookup_cache[cache_key] = self.score_matches(query, cache_key[1], limit)
+        return self.lookup_cache[cache_key]
+
+    def lookup_many(self, batteries, limit=CATALOG_MATCH_LIMIT):
+        return [self.lookup(battery.get("name", ""), battery.get("manufacturer", ""), limit)
+                for battery in batteries]
+
+    def entries_by_manufacturer(self, manufacturer):
+        # Entry ids whose manufacturer is a prefix of the query's or vice versa, resolved once per maker
+        if manufacturer not in self.manufacturer_matches:
+            ids = [ids for maker, ids in self.manufacturer_index.items()
+                   if maker.startswith(manufacturer) or manufacturer.startswith(maker)]
+            self.manufacturer_matches[manufacturer] = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+        return self.manufacturer_matches[manufacturer]
+
+    def score_matches(self, query, manufacturer, limit):
+        if not query or not self.entries:
+            return []
+
+        # Trigram similarity (Jaccard) from posting-list hit counts
+        query_trigrams = [t for t in trigrams(query) if t in self.trigram_index]
+        shared = np.zeros(len(self.entries))
+        if query_trigrams:
+            shared = np.bincount(np.concatenate([self.trigram_index[t] for t in query_trigrams]),
+                                 minlength=len(self.entries)).astype(float)
+        scores = shared / (len(trigrams(query)) + self.trigram_counts - shared)
+
+        # Catalog models starting with the query rank at least as high as a strong fuzzy hit
+        position = bisect_left(self.prefix_keys, query)
+        while position < len(self.prefix_keys) and self.prefix_keys[position].startswith(query):
+            entry_id = self.prefix_ids[position]
+            scores[entry_id] = max(scores[entry_id], 1.0 if self.models[entry_id] == query else 0.8)
+            position += 1
+
+        if manufacturer:
+            scores[self.entries_by_manufacturer(manufacturer)] += 0.1
+
+        candidates = np.flatnonzero(scores >= CATALOG_MIN_SCORE)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(self.entries[i], float(min(scores[i], 1.0))) for i in candidates]
+
+
+def parse_usage_rows(rows):
+    usage_data = []
+    for row in rows:
+        cells = row.find_all('td')
+        if len(cells) >= 4:
+            start_time = cells[0].text.strip()
+            state = cells[1].text.strip()
+            duration = cells[2].text.strip()
+            energy_drained = cells[3].text.strip()
+            if energy_drained != '-' and state in ['Active', 'Connected standby']:
+                try:
+                    time_parts = list(map(int, duration.split(':')))
+                    hours = time_parts[0] + time_parts[1] / 60 + time_parts[2] / 3600
+                    if hours == 0:
+                        continue
+                    date_obj = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+                    usage_data.append({
+                        "date": date_obj,
+                        "hours_used": hours
+                    })
+                except (ValueError, AttributeError, IndexError):
+                    continue
+    return usage_data
+
+
+def parse_usage_chunk(file_path, start, end, skip_header):
+    # Runs in a worker process: reads and parses one row-aligned byte range of the usage table
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        chunk = file.read(end - start).decode('utf-8', errors='replace')
+    rows = BeautifulSoup(f"<table>{chunk}</table>", 'html.parser').find_all('tr')
+    return sorted(parse_usage_rows(rows[1:] if skip_header else rows), key=lambda x: x["date"])
+
+
+def find_usage_rows(content):
+    # Byte range covering the rows of the "Battery usage" table, from its first <tr> to </table>
+    heading = USAGE_HEADING_PATTERN.search(content)
+    if not heading:
+        return None
+    table = TABLE_OPEN_PATTERN.search(content, heading.end())
+    if not table:
+        return None
+    first_row = ROW_OPEN_PATTERN.search(content, table.end())
+    table_close = TABLE_CLOSE_PATTERN.search(content, table.end())
+    if not first_row or not table_close or first_row.start() > table_close.start():
+        return None
+    return first_row.start(), table_close.start()
+
+
+def parse_usage_parallel(file_path, content, rows_start, rows_end, workers=None):
+    workers = workers or os.cpu_count() or 1
+    chunk_count = max(1, min(workers, (rows_end - rows_start) // PARALLEL_PARSE_CHUNK_BYTES))
+
+    # Move each even split forward to the next row start so no row straddles two chunks
+    bounds = [rows_start]
+    for k in range(1, chunk_count):
+        row = ROW_OPEN_PATTERN.search(content, rows_start + k * (rows_end - rows_start) // chunk_count, rows_end)
+        if row and row.start() > bounds[-1]:
+            bounds.append(row.start())
+    bounds.append(rows_end)
+    skip_header = [True] + [False] * (len(bounds) - 2)
+
+    if len(bounds) == 2:
+        return parse_usage_chunk(file_path, rows_start, rows_end, True)
+    try:
+        with ProcessPoolExecutor(max_workers=len(bounds) - 1) as executor:
+            chunks = list(executor.map(parse_usage_chunk, [file_path] * (len(bounds) - 1),
+                                       bounds[:-1], bounds[1:], skip_header))
+    except (OSError, BrokenProcessPool):
+        chunks = [parse_usage_chunk(file_path, start, end, skip)
+                  for start, end, skip in zip(bounds[:-1], bounds[1:], skip_header)]
+    return list(heapq.merge(*chunks, key=lambda x: x["date"]))
+
+
+def parse_report(file_path, parallel_threshold=PARALLEL_PARSE_THRESHOLD):
+    with open(file_path, 'rb') as file:
+        content = file.read()
+
+    # Large reports: cut the usage table out of the document and parse it on a process pool
+    usage_rows = find_usage_rows(content) if len(content) >= parallel_threshold else None
+    content_with_rows = content
+    if usage_rows:
+        content = content[:usage_rows[0]] + content[usage_rows[1]:]
+    soup = BeautifulSoup(content.decode('utf-8'), 'html.parser')
+
+    # Parse Installed Batteries
+    battery_info = {}
+    try:
+        battery_section = soup.find(string=re.compile("Installed batteries", re.I)).find_next('table')
+        if battery_section:
+            rows = battery_section.find_all('tr')
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 2:
+                    key = cells[0].text.strip().lower().replace(' ', '_')
+                    value = cells[1].text.strip()
+                    if key in ['design_capacity', 'full_charge_capacity']:
+                        value = int(re.sub(r'[^\d]', '', value)) if re.sub(r'[^\d]', '', value).isdigit() else 0
+                    battery_info[key] = value
+    except AttributeError:
+        battery_info = {}
+
+    # Parse Battery Capacity History
+    health_data = []
+    try:
+        capacity_section = soup.find(string=re.compile("Battery capacity history", re.I)).find_next('table')
+        if capacity_section:
+            rows = capacity_section.find_all('tr')[1:]  # Skip header
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 3:
+                    period = cells[0].text.strip()
+                    try:
+                        full_charge = int(re.sub(r'[^\d]', '', cells[1].text.strip())) if re.sub(r'[^\d]', '',
+                                                                                                 cells[
+                                                                                                     1].text.strip()).isdigit() else 0
+                        design_capacity = int(re.sub(r'[^\d]', '', cells[2].text.strip())) if re.sub(r'[^\d]', '',
+                                                                                                     cells[
+                                                                                                         2].text.strip()).isdigit() else 0
+                        if design_capacity == 0:
+                            continue
+                        date_match = re.search(r'\d{4}-\d{2}-\d{2}$', period)
+                        if date_match:
+                            end_date = date_match.group(0)
+                            date_obj = datetime.strptime(end_date, "%Y-%m-%d")
+                            health = (full_charge / design_capacity) * 100 if design_capacity else 0
+                            health_data.append({
+                                "date": date_obj,
+                                "health": health
+                            })
+                    except (ValueError, AttributeError):
+                        continue
+    except AttributeError:
+        health_data = []
+
+    # Parse Battery Usage
+    usage_data = []
+    if usage_rows:
+        usage_data = parse_usage_parallel(file_path, content_with_rows, *usage_rows)
+    else:
+        try:
+            usage_section = soup.find(string=re.compile("Battery usage", re.I)).find_next('table')
+            if usage_section:
+                usage_data = sorted(parse_usage_rows(usage_section.find_all('tr')[1:]), key=lambda x: x["date"])
+        except AttributeError:
+            usage_data = []
+
+    return {
+        "installed_batteries": battery_info,
+        "health_data": sorted(health_data, key=lambda x: x["date"]),
+        "usage_data": usage_data
+    }
+
+
+def load_reports(file_paths, workers=None):
+    # Parse several reports at once; each report parses serially inside its own worker
+    reports, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=workers or min(len(file_paths), os.cpu_count() or 1)) as executor:
+        futures = {executor.submit(parse_report, file_path, float('inf')): file_path for file_path in file_paths}
+        for future in as_completed(futures):
+            try:
+                reports[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = str(e)
+    return [(file_path, reports[file_path]) for file_path in file_paths if file_path in reports], errors
+
+
+def align_health_series(health_series):
+    # One row per report on a shared daily index, linearly interpolated between
+    # capacity-history entries and NaN outside each report's own date span
+    spans = [(entries[0]["date"].toordinal(), entries[-1]["date"].toordinal()) for entries in health_series if entries]
+    if not spans:
+        return np.array([], dtype=np.int64), np.empty((len(health_series), 0))
+    first = min(start for start, _ in spans)
+    days = np.arange(first, max(end for _, end in spans) + 1)
+    matrix = np.full((len(health_series), len(days)), np.nan)
+    for row, entries in enumerate(health_series):
+        if not entries:
+            continue
+        ordinals = np.array([entry["date"].toordinal() for entry in entries], dtype=np.int64)
+        healths = np.array([entry["health"] for entry in entries], dtype=float)
+        lo, hi = ordinals[0] - first, ordinals[-1] - first + 1
+        matrix[row, lo:hi] = np.interp(days[lo:hi], ordinals, healths)
+    return days, matrix
+
+
+def linear_forecasts(health_series):
+    # Least-squares slope (health per day) over each report's observed capacity-history
+    # points, fitted for every report at once, plus each report's latest point
+    counts = np.array([len(entries) for entries in health_series])
+    rows = np.repeat(np.arange(len(health_series)), counts)
+    ordinals = np.array([entry["date"].toordinal() for entries in health_series for entry in entries], dtype=float)
+    healths = np.array([entry["health"] for entries in health_series for entry in entries], dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        day_offsets = ordinals - (np.bincount(rows, weights=ordinals, minlength=len(counts)) / counts)[rows]
+        health_offsets = healths - (np.bincount(rows, weights=healths, minlength=len(counts)) / counts)[rows]
+        slopes = (np.bincount(rows, weights=day_offsets * health_offsets, minlength=len(counts)) /
+                  np.bincount(rows, weights=day_offsets ** 2, minlength=len(counts)))
+    last_index = np.maximum(np.cumsum(counts) - 1, 0)
+    return slopes, ordinals[last_index].astype(np.int64), healths[last_index]
+
+
+def forecast_health(health_data, target):
+    # Linear fit of health over time; returns the slope in %/day and the date the target is reached
+    ordinals = np.array([entry["date"].toordinal() for entry in health_data]).reshape(-1, 1)
+    healths = np.array([entry["health"] for entry in health_data])
+    model = LinearRegression()
+    model.fit(ordinals, healths)
+    slope_per_day = model.coef_[0]
+    if slope_per_day >= 0:
+        return slope_per_day, None
+    days_to_target = (healths[-1] - target) / -slope_per_day
+    # A nearly flat fit can put the target outside the representable date range
+    target_ordinal = health_data[-1]["date"].toordinal() + days_to_target
+    if not date.min.toordinal() <= target_ordinal < date.max.toordinal():
+        return slope_per_day, None
+    return slope_per_day, health_data[-1]["date"] + timedelta(days=days_to_target)
+
+
+def json_safe(value):
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) or np.isinf(value) else float(value)
+    return value
+
+
+def analyze_report(content, target=80.0):
+    # Runs in a service worker: the same parsing and tab analytics as the window, as JSON-ready data
+    with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as file:
+        file.write(content)
+    try:
+        # The service pool already runs one report per core, so don't nest another pool
+        battery_data = parse_report(file.name, float('inf'))
+    finally:
+        os.remove(file.name)
+
+    health_data = battery_data["health_data"]
+    usage_data = battery_data["usage_data"]
+    degradation_series = daily_degradation_series(health_data)
+    usage_series = daily_usage_series(usage_data)
+    result = {
+        "battery": battery_data["installed_batteries"],
+        "health": {"entries": len(health_data)},
+        "degradation": {},
+        "usage": {"entries": len(usage_data)},
+        "correlations": correlation_analysis(degradation_series, usage_series),
+        "forecast": {"target": target}
+    }
+
+    if health_data:
+        result["health"].update({
+            "first_date": health_data[0]["date"],
+            "last_date": health_data[-1]["date"],
+            "first": health_data[0]["health"],
+            "latest": health_data[-1]["health"]
+        })
+    if len(degradation_series):
+        first_day, last_day = degradation_series.first_day, degradation_series.last_day
+        result["degradation"] = {
+            "total": degradation_series.total(first_day, last_day),
+            "per_day": degradation_series.rate(first_day, last_day)
+        }
+    intervals = degradation_intervals(health_data)
+    if intervals and len(intervals["rate"]):
+        result["degradation"]["worst_intervals"] = [
+            {key: intervals[key][i] for key in ("start", "end", "days", "drop", "rate")}
+            for i in top_k_indices(intervals["rate"], INSIGHTS_TOP_K)
+        ]
+    if len(usage_series):
+        first_day, last_day = usage_series.first_day, usage_series.last_day
+        result["usage"].update({
+            "total_hours": usage_series.total(first_day, last_day),
+            "hours_per_day": usage_series.rate(first_day, last_day)
+        })
+    if len(health_data) >= 2:
+        slope_per_day, predicted_date = forecast_health(health_data, target)
+        result["forecast"].update({"slope_per_day": slope_per_day, "predicted_date": predicted_date})
+    return json_safe(result)
+
+
+class AnalysisService:
+    # Runs analyze_report on a process pool with a bounded number of pending jobs,
+    # an LRU cache keyed by content hash and target, and latency/throughput metrics.
+    def __init__(self, workers=None, max_pending=SERVICE_MAX_PENDING, cache_size=SERVICE_CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        # Uploads being received or answered; checked before a body is read so memory stays bounded
+        self.admission = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.in_flight = {}
+        # Re-entrant: future callbacks can run synchronously in a thread that already holds it
+        self.lock = threading.RLock()
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=SERVICE_LATENCY_WINDOW)
+        self.counts = defaultdict(int)
+
+    def admit(self):
+        if self.admission.acquire(blocking=False):
+            return True
+        with self.lock:
+            self.counts["requests"] += 1
+            self.counts["rejected"] += 1
+        return False
+
+    def release(self):
+        self.admission.release()
+
+    def analyze(self, content, target):
+        started = time.monotonic()
+        key = (hashlib.sha256(content).hexdigest(), target)
+        with self.lock:
+            self.counts["requests"] += 1
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counts["cache_hits"] += 1
+                self.latencies.append(time.monotonic() - started)
+                return 200, self.cache[key]
+            # Identical uploads already being analyzed share the running job
+            future = self.in_flight.get(key)
+            if future is None:
+                if not self.slots.acquire(blocking=False):
+                    self.counts["rejected"] += 1
+                    return 503, {"error": "Too many pending analyses, retry later"}
+                executor = self.executor
+                try:
+                    future = executor.submit(analyze_report, content, target)
+                except (BrokenProcessPool, RuntimeError):
+                    self.slots.release()
+                    self.restart_executor(executor)
+                    self.counts["errors"] += 1
+                    return 503, {"error": "Analysis workers restarted, retry later"}
+                self.in_flight[key] = future
+            else:
+                executor = None
+        # Registered outside the lock: a job that already finished runs the callback right here
+        if executor is not None:
+            future.add_done_callback(partial(self.finish_job, key, executor))
+
+        try:
+            result = future.result(timeout=SERVICE_TIMEOUT)
+        except FutureTimeoutError:
+            status, payload = 504, {"error": "Analysis timed out"}
+        except BrokenProcessPool:
+            status, payload = 503, {"error": "Analysis worker crashed, retry later"}
+        except CancelledError:
+            status, payload = 503, {"error": "Analysis cancelled, retry later"}
+        except Exception as e:
+            status, payload = 422, {"error": f"Could not analyze report: {str(e)}"}
+        else:
+            status, payload = 200, {"sha256": key[0], **result}
+
+        with self.lock:
+            self.counts["completed" if status == 200 else "errors"] += 1
+            self.latencies.append(time.monotonic() - started)
+        return status, payload
+
+    def finish_job(self, key, executor, future):
+        # Runs when the pool job ends, even if its request already timed out,
+        # so a slot stays taken for as long as the job occupies the pool
+        try:
+            with self.lock:
+                self.in_flight.pop(key, None)
+                if future.cancelled():
+                    return
+                error = future.exception()
+                if error is None:
+                    self.cache[key] = {"sha256": key[0], **future.result()}
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                elif isinstance(error, BrokenProcessPool):
+                    self.restart_executor(executor)
+        finally:
+            self.slots.release()
+
+    def restart_executor(self, broken):
+        # Called with the lock held; replaces the pool only if nobody has already
+        if self.executor is broken:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.counts["pool_restarts"] += 1
+            broken.shutdown(wait=False)
+
+    def metrics(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            uptime = time.monotonic() - self.started
+            metrics = {
+                "uptime_seconds": uptime,
+                "pending": len(self.in_flight),
+                "max_pending": self.max_pending,
+                "cache_entries": len(self.cache),
+                **{name: self.counts[name] for name in ("requests", "completed", "cache_hits", "rejected", "errors",
+                                                  "pool_restarts")},
+                "throughput_per_second": self.counts["completed"] / uptime if uptime else 0.0
+            }
+        if len(latencies):
+            metrics["latency_ms"] = dict(zip(("p50", "p95", "p99", "max"),
+                                             np.percentile(latencies, [50, 95, 99, 100]).tolist()))
+        return metrics
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    # POST /analyze?target=80 with the report HTML as the body; GET /metrics and /health
+    def send_json(self, status, payload):
+        body = json.dumps(json_safe(payload)).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        if status >= 400:
+            # The request body may be unread, so don't reuse the connection
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif path == "/metrics":
+            self.send_json(200, self.server.service.metrics())
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/analyze":
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            target = float(parse_qs(url.query).get("target", ["80"])[0])
+            if not 0 <= target <= 100:
+                raise ValueError("Target health must be between 0 and 100")
+        except ValueError as e:
+            self.send_json(400, {"error": f"Invalid target ({str(e)})"})
+            return
+
+        length = self.headers.get("Content-Length")
+        if not length or not length.isdigit():
+            self.send_json(411, {"error": "Content-Length required"})
+            return
+        if int(length) > SERVICE_MAX_UPLOAD_BYTES:
+            self.send_json(413, {"error": "Report too large"})
+            return
+
+        service = self.server.service
+        if not service.admit():
+            self.send_json(503, {"error": "Too many pending analyses, retry later"})
+            return
+        try:
+            content = self.rfile.read(int(length))
+            if len(content) < int(length):
+                # Client went away mid-upload; nothing to analyze or answer
+                self.close_connection = True
+                return
+            self.send_json(*service.analyze(content, target))
+        finally:
+            service.release()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=SERVICE_PORT, workers=None, max_pending=SERVICE_MAX_PENDING,
+          cache_size=SERVICE_CACHE_SIZE):
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = AnalysisService(workers, max_pending, cache_size)
+    print(f"Battery Report Analyzer service listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+
+
 class BatteryReportApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -30,8 +873,15 @@ class BatteryReportApp(QMainWindow):
             "usage_data": []
         }
         self.debug_log = []
+        self.replacement_catalog = None
+        self.insight_intervals = None
+        self.insight_candidates = np.array([], dtype=np.int64)
+        self.insights_page = 0
+        self.comparison = None
+        self.build_series()
 
         self.init_ui()
+        self.update_selector_visibility()
         self.load_styles()
 
     def init_ui(self):
@@ -67,7 +917,7 @@ class BatteryReportApp(QMainWindow):
         period_layout = QHBoxLayout()
         period_label = QLabel("Group By:")
         self.period_combo = QComboBox()
-        self.period_combo.addItems(["Year", "Month", "Week"])
+        self.period_combo.addItems(PERIOD_OPTIONS)
         self.period_combo.currentTextChanged.connect(self.update_degradation_periods)
         period_layout.addWidget(period_label)
         period_layout.addWidget(self.period_combo)
@@ -84,6 +934,15 @@ class BatteryReportApp(QMainWindow):
         self.week_combo.currentTextChanged.connect(self.update_degradation_display)
         period_layout.addWidget(self.week_combo)
 
+        self.iso_week_combo = QComboBox()
+        self.iso_week_combo.currentTextChanged.connect(self.update_degradation_display)
+        period_layout.addWidget(self.iso_week_combo)
+
+        self.from_date_edit = self.create_date_edit(self.update_degradation_display)
+        period_layout.addWidget(self.from_date_edit)
+        self.to_date_edit = self.create_date_edit(self.update_degradation_display)
+        period_layout.addWidget(self.to_date_edit)
+
         period_layout.addStretch()
         current_layout.addLayout(period_layout)
 
@@ -111,6 +970,24 @@ class BatteryReportApp(QMainWindow):
         self.insights_label = QLabel()
         insights_layout.addWidget(self.insights_label)
 
+        self.insights_table = QTableWidget()
+        self.insights_table.setColumnCount(5)
+        self.insights_table.setHorizontalHeaderLabels(["Rank", "Interval", "Days", "Drop (%)", "Rate (%/day)"])
+        self.insights_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        insights_layout.addWidget(self.insights_table)
+
+        insights_page_layout = QHBoxLayout()
+        self.insights_prev_button = QPushButton("◀ Prev")
+        self.insights_prev_button.clicked.connect(lambda: self.show_insights_page(self.insights_page - 1))
+        insights_page_layout.addWidget(self.insights_prev_button)
+        self.insights_page_label = QLabel()
+        insights_page_layout.addWidget(self.insights_page_label)
+        self.insights_next_button = QPushButton("Next ▶")
+        self.insights_next_button.clicked.connect(lambda: self.show_insights_page(self.insights_page + 1))
+        insights_page_layout.addWidget(self.insights_next_button)
+        insights_page_layout.addStretch()
+        insights_layout.addLayout(insights_page_layout)
+
         # Projections Tab
         projections_tab = QWidget()
         projections_layout = QVBoxLayout(projections_tab)
@@ -125,6 +1002,14 @@ class BatteryReportApp(QMainWindow):
         target_layout.addWidget(target_label)
         target_layout.addWidget(self.target_input)
         target_layout.addWidget(predict_button)
+
+        compare_button = QPushButton("📑 Compare Reports")
+        compare_button.clicked.connect(self.load_comparison)
+        target_layout.addWidget(compare_button)
+
+        clear_compare_button = QPushButton("✖ Clear Comparison")
+        clear_compare_button.clicked.connect(self.clear_comparison)
+        target_layout.addWidget(clear_compare_button)
         target_layout.addStretch()
         projections_layout.addLayout(target_layout)
 
@@ -138,6 +1023,9 @@ class BatteryReportApp(QMainWindow):
         self.plot_widget.setTitle("Battery Health Over Time")
         self.plot_widget.setLabel('left', 'Health (%)')
         self.plot_widget.setLabel('bottom', 'Date')
+        self.plot_widget.setClipToView(True)
+        self.plot_widget.setDownsampling(auto=True, mode='peak')
+        self.plot_widget.addLegend()
         projections_layout.addWidget(self.plot_widget)
 
         # Battery Info Tab
@@ -148,9 +1036,29 @@ class BatteryReportApp(QMainWindow):
         self.battery_info_label = QLabel()
         battery_info_layout.addWidget(self.battery_info_label)
 
+        catalog_layout = QHBoxLayout()
         search_button = QPushButton("🔎 Search for Replacements")
         search_button.clicked.connect(self.search_replacements)
-        battery_info_layout.addWidget(search_button)
+        catalog_layout.addWidget(search_button)
+
+        load_catalog_button = QPushButton("📚 Load Catalog")
+        load_catalog_button.clicked.connect(self.load_catalog)
+        catalog_layout.addWidget(load_catalog_button)
+
+        fleet_button = QPushButton("🚚 Fleet Lookup")
+        fleet_button.clicked.connect(self.fleet_lookup)
+        catalog_layout.addWidget(fleet_button)
+        catalog_layout.addStretch()
+        battery_info_layout.addLayout(catalog_layout)
+
+        self.catalog_status_label = QLabel()
+        battery_info_layout.addWidget(self.catalog_status_label)
+
+        self.replacement_table = QTableWidget()
+        self.replacement_table.setColumnCount(5)
+        self.replacement_table.setHorizontalHeaderLabels(["Battery", "Manufacturer", "Model", "Match (%)", "Details"])
+        self.replacement_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        battery_info_layout.addWidget(self.replacement_table)
 
         # Usage Tab
         usage_tab = QWidget()
@@ -161,7 +1069,7 @@ class BatteryReportApp(QMainWindow):
         usage_period_layout = QHBoxLayout()
         usage_period_label = QLabel("Group By:")
         self.usage_period_combo = QComboBox()
-        self.usage_period_combo.addItems(["Year", "Month", "Week"])
+        self.usage_period_combo.addItems(PERIOD_OPTIONS)
         self.usage_period_combo.currentTextChanged.connect(self.update_usage_periods)
         usage_period_layout.addWidget(usage_period_label)
         usage_period_layout.addWidget(self.usage_period_combo)
@@ -178,6 +1086,15 @@ class BatteryReportApp(QMainWindow):
         self.usage_week_combo.currentTextChanged.connect(self.update_usage)
         usage_period_layout.addWidget(self.usage_week_combo)
 
+        self.usage_iso_week_combo = QComboBox()
+        self.usage_iso_week_combo.currentTextChanged.connect(self.update_usage)
+        usage_period_layout.addWidget(self.usage_iso_week_combo)
+
+        self.usage_from_date_edit = self.create_date_edit(self.update_usage)
+        usage_period_layout.addWidget(self.usage_from_date_edit)
+        self.usage_to_date_edit = self.create_date_edit(self.update_usage)
+        usage_period_layout.addWidget(self.usage_to_date_edit)
+
         usage_period_layout.addStretch()
         usage_layout.addLayout(usage_period_layout)
 
@@ -250,99 +1167,22 @@ class BatteryReportApp(QMainWindow):
             return
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                soup = BeautifulSoup(file, 'html.parser')
+            self.battery_data = parse_report(file_path)
         except Exception as e:
             self.degradation_stats.setText(f"⚠️ Error loading file: {str(e)}")
             return
+        # A newly loaded report replaces any comparison overlay on the Projections tab
+        self.comparison = None
 
-        # Parse Installed Batteries
-        battery_info = {}
-        try:
-            battery_section = soup.find(string=re.compile("Installed batteries", re.I)).find_next('table')
-            if battery_section:
-                rows = battery_section.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        key = cells[0].text.strip().lower().replace(' ', '_')
-                        value = cells[1].text.strip()
-                        if key in ['design_capacity', 'full_charge_capacity']:
-                            value = int(re.sub(r'[^\d]', '', value)) if re.sub(r'[^\d]', '', value).isdigit() else 0
-                        battery_info[key] = value
-        except AttributeError:
-            battery_info = {}
-        self.battery_data["installed_batteries"] = battery_info
-
-        # Parse Battery Capacity History
-        health_data = []
-        try:
-            capacity_section = soup.find(string=re.compile("Battery capacity history", re.I)).find_next('table')
-            if capacity_section:
-                rows = capacity_section.find_all('tr')[1:]  # Skip header
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 3:
-                        period = cells[0].text.strip()
-                        try:
-                            full_charge = int(re.sub(r'[^\d]', '', cells[1].text.strip())) if re.sub(r'[^\d]', '',
-                                                                                                     cells[
-                                                                                                         1].text.strip()).isdigit() else 0
-                            design_capacity = int(re.sub(r'[^\d]', '', cells[2].text.strip())) if re.sub(r'[^\d]', '',
-                                                                                                         cells[
-                                                                                                             2].text.strip()).isdigit() else 0
-                            if design_capacity == 0:
-                                continue
-                            date_match = re.search(r'\d{4}-\d{2}-\d{2}$', period)
-                            if date_match:
-                                end_date = date_match.group(0)
-                                date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-                                health = (full_charge / design_capacity) * 100 if design_capacity else 0
-                                health_data.append({
-                                    "date": date_obj,
-                                    "health": health
-                                })
-                        except (ValueError, AttributeError):
-                            continue
-        except AttributeError:
-            health_data = []
-        self.battery_data["health_data"] = sorted(health_data, key=lambda x: x["date"])
-        self.debug_log.append(f"Health data entries: {len(self.battery_data['health_data'])}")
+        health_data = self.battery_data["health_data"]
+        self.debug_log.append(f"Health data entries: {len(health_data)}")
         if health_data:
             self.debug_log.append(
                 f"Health data range: {health_data[0]['date'].strftime('%Y-%m-%d')} to {health_data[-1]['date'].strftime('%Y-%m-%d')}")
             self.debug_log.append(f"Health range: {health_data[0]['health']:.2f}% to {health_data[-1]['health']:.2f}%")
 
-        # Parse Battery Usage
-        usage_data = []
-        try:
-            usage_section = soup.find(string=re.compile("Battery usage", re.I)).find_next('table')
-            if usage_section:
-                rows = usage_section.find_all('tr')[1:]  
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:
-                        start_time = cells[0].text.strip()
-                        state = cells[1].text.strip()
-                        duration = cells[2].text.strip()
-                        energy_drained = cells[3].text.strip()
-                        if energy_drained != '-' and state in ['Active', 'Connected standby']:
-                            try:
-                                time_parts = list(map(int, duration.split(':')))
-                                hours = time_parts[0] + time_parts[1] / 60 + time_parts[2] / 3600
-                                if hours == 0:
-                                    continue
-                                date_obj = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                                usage_data.append({
-                                    "date": date_obj,
-                                    "hours_used": hours
-                                })
-                            except (ValueError, AttributeError):
-                                continue
-        except AttributeError:
-            usage_data = []
-        self.battery_data["usage_data"] = sorted(usage_data, key=lambda x: x["date"])
-        self.debug_log.append(f"Usage data entries: {len(self.battery_data['usage_data'])}")
+        usage_data = self.battery_data["usage_data"]
+        self.debug_log.append(f"Usage data entries: {len(usage_data)}")
         if usage_data:
             self.debug_log.append(
                 f"Usage data range: {usage_data[0]['date'].strftime('%Y-%m-%d %H:%M:%S')} to {usage_data[-1]['date'].strftime('%Y-%m-%d %H:%M:%S')}")
@@ -350,6 +1190,8 @@ class BatteryReportApp(QMainWindow):
         # Display debug log in UI
         self.debug_label.setText("📋 Debug Log:\n" + "\n".join(self.debug_log))
 
+        self.build_series()
+
         # UI
         self.update_degradation_periods()
         self.update_usage_periods()
@@ -358,22 +1200,136 @@ class BatteryReportApp(QMainWindow):
         self.update_usage()
         self.update_projections()
 
+    def build_series(self):
+        self.degradation_series = daily_degradation_series(self.battery_data["health_data"])
+        self.usage_series = daily_usage_series(self.battery_data["usage_data"])
+        self.correlation_results = correlation_analysis(self.degradation_series, self.usage_series)
+        self.degradation_extremes = calendar_period_extremes(self.degradation_series)
+        self.usage_extremes = calendar_period_extremes(self.usage_series)
+
+    def create_date_edit(self, callback):
+        date_edit = QDateEdit()
+        date_edit.setCalendarPopup(True)
+        date_edit.setDisplayFormat("yyyy-MM-dd")
+        date_edit.dateChanged.connect(callback)
+        return date_edit
+
+    def update_period_widgets(self, period, year_combo, month_combo, week_combo, iso_week_combo,
+                              from_date_edit, to_date_edit):
+        year_combo.setVisible(period in ("year", "month", "week"))
+        month_combo.setVisible(period in ("month", "week"))
+        week_combo.setVisible(period == "week")
+        iso_week_combo.setVisible(period == "iso week")
+        from_date_edit.setVisible(period == "date range")
+        to_date_edit.setVisible(period == "date range")
+
+    def update_selector_visibility(self):
+        self.update_period_widgets(self.period_combo.currentText().lower(), self.year_combo, self.month_combo,
+                                   self.week_combo, self.iso_week_combo, self.from_date_edit, self.to_date_edit)
+        self.update_period_widgets(self.usage_period_combo.currentText().lower(), self.usage_year_combo,
+                                   self.usage_month_combo, self.usage_week_combo, self.usage_iso_week_combo,
+                                   self.usage_from_date_edit, self.usage_to_date_edit)
+
+    def populate_range_widgets(self, series, iso_week_combo, from_date_edit, to_date_edit):
+        # The period combo chain refreshes the display afterwards, so don't let each change trigger it
+        for widget in (iso_week_combo, from_date_edit, to_date_edit):
+            widget.blockSignals(True)
+        try:
+            self.fill_range_widgets(series, iso_week_combo, from_date_edit, to_date_edit)
+        finally:
+            for widget in (iso_week_combo, from_date_edit, to_date_edit):
+                widget.blockSignals(False)
+
+    def fill_range_widgets(self, series, iso_week_combo, from_date_edit, to_date_edit):
+        iso_week_combo.clear()
+        if not len(series):
+            return
+
+        first_day, last_day = series.first_day, series.last_day
+        weeks = []
+        monday = first_day - timedelta(days=first_day.weekday())
+        while monday <= last_day:
+            iso_year, iso_week, _ = monday.isocalendar()
+            weeks.append(f"{iso_year}-W{iso_week:02d}")
+            monday += timedelta(days=7)
+        iso_week_combo.addItems(weeks)
+
+        for date_edit in (from_date_edit, to_date_edit):
+            date_edit.setDateRange(QDate(first_day.year, first_day.month, first_day.day),
+                                   QDate(last_day.year, last_day.month, last_day.day))
+        from_date_edit.setDate(QDate(first_day.year, first_day.month, first_day.day))
+        to_date_edit.setDate(QDate(last_day.year, last_day.month, last_day.day))
+
+    def get_selected_range(self, period, series, year_combo, month_combo, week_combo, iso_week_combo,
+                           from_date_edit, to_date_edit):
+        if period in ROLLING_WINDOWS:
+            if not len(series):
+                return None
+            end_date = series.last_day
+            start_date = end_date - timedelta(days=ROLLING_WINDOWS[period] - 1)
+            return start_date, end_date, f"the last {ROLLING_WINDOWS[period]} days"
+
+        if period == "iso week":
+            selected_iso_week = iso_week_combo.currentText()
+            if not selected_iso_week:
+                return None
+            iso_year, iso_week = selected_iso_week.split("-W")
+            start_date = date.fromisocalendar(int(iso_year), int(iso_week), 1)
+            return start_date, start_date + timedelta(days=6), f"ISO week {selected_iso_week}"
+
+        if period == "date range":
+            start_date = from_date_edit.date().toPyDate()
+            end_date = to_date_edit.date().toPyDate()
+            if start_date > end_date:
+                return None
+            return start_date, end_date, f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+
+        selected_year = year_combo.currentText()
+        selected_month = month_combo.currentText()
+        selected_week = week_combo.currentText()
+        if not selected_year.isdigit():
+            return None
+
+        year = int(selected_year)
+        if period == "year":
+            return date(year, 1, 1), date(year, 12, 31), selected_year
+        if not selected_month or "No months" in selected_month:
+            return None
+
+        month = datetime.strptime(selected_month.split()[0], "%B").month
+        if period == "month":
+            return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1]), selected_month
+        if period == "week" and selected_week and "No weeks" not in selected_week:
+            week_num = int(selected_week.split()[1].split(':')[0])
+            start_date, end_date = self.get_week_range(year, month, week_num)
+            return start_date.date(), end_date.date(), f"{selected_month}, {selected_week}"
+        return None
+
     def get_week_range(self, year, month, week_num):
+        # Week 1 runs from the 1st to the first Sunday; later weeks run Monday to Sunday
         first_day = datetime(year, month, 1)
         days_to_monday = (7 - first_day.weekday()) % 7
         if days_to_monday == 0:
             days_to_monday = 7
-        start_date = first_day + timedelta(days=days_to_monday * (week_num - 1))
-        end_date = start_date + timedelta(days=6)
+        if week_num == 1:
+            start_date = first_day
+            end_date = first_day + timedelta(days=days_to_monday - 1)
+        else:
+            start_date = first_day + timedelta(days=days_to_monday + 7 * (week_num - 2))
+            end_date = start_date + timedelta(days=6)
         last_day = calendar.monthrange(year, month)[1]
         end_date = min(end_date, datetime(year, month, last_day))
         return start_date, end_date
 
     def update_degradation_periods(self):
         health_data = self.battery_data["health_data"]
+        self.update_period_widgets(self.period_combo.currentText().lower(), self.year_combo, self.month_combo,
+                                   self.week_combo, self.iso_week_combo, self.from_date_edit, self.to_date_edit)
         self.year_combo.clear()
         self.month_combo.clear()
         self.week_combo.clear()
+        self.populate_range_widgets(self.degradation_series, self.iso_week_combo,
+                                    self.from_date_edit, self.to_date_edit)
 
         if not health_data:
             return
@@ -429,54 +1385,14 @@ class BatteryReportApp(QMainWindow):
             self.specific_degradation_label.setText("⚠️ No period selected")
             return
 
-        daily_degradations = []
-        for i in range(1, len(health_data)):
-            prev_health = health_data[i - 1]["health"]
-            curr_health = health_data[i]["health"]
-            degradation = prev_health - curr_health
-            date_start = health_data[i - 1]["date"]
-            date_end = health_data[i]["date"]
-            days = (date_end - date_start).days
-            if days > 0:
-                daily_deg = degradation / days
-                for d in range(days):
-                    current_date = date_start + timedelta(days=d)
-                    daily_degradations.append({"date": current_date, "degradation": daily_deg})
-
-        if not daily_degradations:
+        if not len(self.degradation_series):
             self.degradation_stats.setText("⚠️ No degradation data available")
             self.specific_degradation_label.setText("⚠️ No degradation data available")
             return
 
-        weekly_degs = defaultdict(float)
-        monthly_degs = defaultdict(float)
-        yearly_degs = defaultdict(float)
-
-        for deg in daily_degradations:
-            date = deg["date"]
-            degradation = deg["degradation"]
-            year = date.year
-            month = date.month
-            first_day = datetime(year, month, 1)
-            days_to_monday = (7 - first_day.weekday()) % 7
-            if days_to_monday == 0:
-                days_to_monday = 7
-            day_of_month = date.day
-            week_num = ((day_of_month - 1) + days_to_monday) // 7 + 1
-            week_key = f"{year}-{month:02d}-W{week_num}"
-            monthly_key = f"{year}-{month:02d}"
-            yearly_key = str(year)
-
-            weekly_degs[week_key] += degradation
-            monthly_degs[monthly_key] += degradation
-            yearly_degs[yearly_key] += degradation
-
-        most_degraded_week = max(weekly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_degraded_week = min(weekly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
-        most_degraded_month = max(monthly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_degraded_month = min(monthly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
-        most_degraded_year = max(yearly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_degraded_year = min(yearly_degs.items(), key=lambda x: x[1], default=("N/A", 0))
+        most_degraded_week, least_degraded_week = self.degradation_extremes["week"]
+        most_degraded_month, least_degraded_month = self.degradation_extremes["month"]
+        most_degraded_year, least_degraded_year = self.degradation_extremes["year"]
 
         stats_text = (
             f"📈 Most Degraded Week: {most_degraded_week[0]} ({most_degraded_week[1]:.2f}%)\n"
@@ -488,30 +1404,15 @@ class BatteryReportApp(QMainWindow):
         )
         self.degradation_stats.setText(stats_text)
 
-        selected_year = self.year_combo.currentText()
-        selected_month = self.month_combo.currentText()
-        selected_week = self.week_combo.currentText()
-
-        if not selected_year:
-            self.specific_degradation_label.setText("⚠️ Please select a year")
-            return
-
-        selected_year = int(selected_year)
-        if period == "year":
-            total_deg = yearly_degs.get(str(selected_year), 0)
-            self.specific_degradation_label.setText(f"🔍 Degradation in {selected_year}: {total_deg:.2f}%")
-        elif period == "month" and selected_month:
-            selected_month_num = datetime.strptime(selected_month.split()[0], "%B").month
-            month_key = f"{selected_year}-{selected_month_num:02d}"
-            total_deg = monthly_degs.get(month_key, 0)
-            self.specific_degradation_label.setText(f"🔍 Degradation in {selected_month}: {total_deg:.2f}%")
-        elif period == "week" and selected_month and selected_week:
-            selected_month_num = datetime.strptime(selected_month.split()[0], "%B").month
-            week_num = int(selected_week.split()[1].split(':')[0])
-            week_key = f"{selected_year}-{selected_month_num:02d}-W{week_num}"
-            total_deg = weekly_degs.get(week_key, 0)
-            self.specific_degradation_label.setText(
-                f"🔍 Degradation in {selected_month}, {selected_week}: {total_deg:.2f}%")
+        selected_range = self.get_selected_range(period, self.degradation_series, self.year_combo,
+                                                 self.month_combo, self.week_combo, self.iso_week_combo,
+                                                 self.from_date_edit, self.to_date_edit)
+        if selected_range:
+            start_date, end_date, range_label = selected_range
+            total_deg = self.degradation_series.total(start_date, end_date)
+            daily_rate = self.degradation_series.rate(start_date, end_date)
+            rate_text = f" ({daily_rate:.3f}%/day)" if daily_rate is not None else ""
+            self.specific_degradation_label.setText(f"🔍 Degradation in {range_label}: {total_deg:.2f}%{rate_text}")
         else:
             self.specific_degradation_label.setText("⚠️ Please select a period")
 
@@ -522,9 +1423,14 @@ class BatteryReportApp(QMainWindow):
 
     def update_usage_periods(self):
         usage_data = self.battery_data["usage_data"]
+        self.update_period_widgets(self.usage_period_combo.currentText().lower(), self.usage_year_combo,
+                                   self.usage_month_combo, self.usage_week_combo, self.usage_iso_week_combo,
+                                   self.usage_from_date_edit, self.usage_to_date_edit)
         self.usage_year_combo.clear()
         self.usage_month_combo.clear()
         self.usage_week_combo.clear()
+        self.populate_range_widgets(self.usage_series, self.usage_iso_week_combo,
+                                    self.usage_from_date_edit, self.usage_to_date_edit)
 
         if not usage_data:
             return
@@ -588,35 +1494,9 @@ class BatteryReportApp(QMainWindow):
             self.correlation_label.setText("⚠️ No correlation data available")
             return
 
-        weekly_usage = defaultdict(float)
-        monthly_usage = defaultdict(float)
-        yearly_usage = defaultdict(float)
-
-        for entry in usage_data:
-            date = entry["date"]
-            hours = entry["hours_used"]
-            year = date.year
-            month = date.month
-            first_day = datetime(year, month, 1)
-            days_to_monday = (7 - first_day.weekday()) % 7
-            if days_to_monday == 0:
-                days_to_monday = 7
-            day_of_month = date.day
-            week_num = ((day_of_month - 1) + days_to_monday) // 7 + 1
-            week_key = f"{year}-{month:02d}-W{week_num}"
-            monthly_key = f"{year}-{month:02d}"
-            yearly_key = str(year)
-
-            weekly_usage[week_key] += hours
-            monthly_usage[monthly_key] += hours
-            yearly_usage[yearly_key] += hours
-
-        most_used_week = max(weekly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_used_week = min(weekly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
-        most_used_month = max(monthly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_used_month = min(monthly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
-        most_used_year = max(yearly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
-        least_used_year = min(yearly_usage.items(), key=lambda x: x[1], default=("N/A", 0))
+        most_used_week, least_used_week = self.usage_extremes["week"]
+        most_used_month, least_used_month = self.usage_extremes["month"]
+        most_used_year, least_used_year = self.usage_extremes["year"]
 
         def format_time(hours):
             if hours < 1:
@@ -626,8 +1506,6 @@ class BatteryReportApp(QMainWindow):
 
         period = self.usage_period_combo.currentText().lower()
         selected_year = self.usage_year_combo.currentText()
-        selected_month = self.usage_month_combo.currentText()
-        selected_week = self.usage_week_combo.currentText()
 
         usage_text = "⏰ Battery Usage (Time on Battery):\n\n"
         usage_text += f"📈 Most Used Week: {most_used_week[0]} ({format_time(most_used_week[1])})\n"
@@ -637,22 +1515,18 @@ class BatteryReportApp(QMainWindow):
         usage_text += f"📈 Most Used Year: {most_used_year[0]} ({format_time(most_used_year[1])})\n"
         usage_text += f"📉 Least Used Year: {least_used_year[0]} ({format_time(least_used_year[1])})\n\n"
 
+        selected_range = self.get_selected_range(period, self.usage_series, self.usage_year_combo,
+                                                 self.usage_month_combo, self.usage_week_combo,
+                                                 self.usage_iso_week_combo, self.usage_from_date_edit,
+                                                 self.usage_to_date_edit)
         if not selected_year or "No usage years" in selected_year:
             usage_text += "⚠️ No usage years available"
-        elif period == "year":
-            total_hours = yearly_usage.get(selected_year, 0)
-            usage_text += f"🔍 Usage in {selected_year}: {format_time(total_hours)}"
-        elif period == "month" and selected_month and "No months" not in selected_month:
-            selected_month_num = datetime.strptime(selected_month.split()[0], "%B").month
-            month_key = f"{selected_year}-{selected_month_num:02d}"
-            total_hours = monthly_usage.get(month_key, 0)
-            usage_text += f"🔍 Usage in {selected_month}: {format_time(total_hours)}"
-        elif period == "week" and selected_month and selected_week and "No weeks" not in selected_week:
-            selected_month_num = datetime.strptime(selected_month.split()[0], "%B").month
-            week_num = int(selected_week.split()[1].split(':')[0])
-            week_key = f"{selected_year}-{selected_month_num:02d}-W{week_num}"
-            total_hours = weekly_usage.get(week_key, 0)
-            usage_text += f"🔍 Usage in {selected_month}, {selected_week}: {format_time(total_hours)}"
+        elif selected_range:
+            start_date, end_date, range_label = selected_range
+            total_hours = self.usage_series.total(start_date, end_date)
+            daily_hours = self.usage_series.rate(start_date, end_date)
+            rate_text = f" ({format_time(daily_hours)}/day)" if daily_hours is not None else ""
+            usage_text += f"🔍 Usage in {range_label}: {format_time(total_hours)}{rate_text}"
         else:
             usage_text += "⚠️ Please select a period"
 
@@ -662,44 +1536,16 @@ class BatteryReportApp(QMainWindow):
             self.correlation_label.setText("⚠️ No correlation data available")
             return
 
-        weekly_degs = defaultdict(float)
-        for i in range(1, len(health_data)):
-            prev_health = health_data[i - 1]["health"]
-            curr_health = health_data[i]["health"]
-            degradation = prev_health - curr_health
-            date_start = health_data[i - 1]["date"]
-            date_end = health_data[i]["date"]
-            days = (date_end - date_start).days
-            if days > 0:
-                daily_deg = degradation / days
-                for d in range(days):
-                    current_date = date_start + timedelta(days=d)
-                    year = current_date.year
-                    month = current_date.month
-                    first_day = datetime(year, month, 1)
-                    days_to_monday = (7 - first_day.weekday()) % 7
-                    if days_to_monday == 0:
-                        days_to_monday = 7
-                    day_of_month = current_date.day
-                    week_num = ((day_of_month - 1) + days_to_monday) // 7 + 1
-                    week_key = f"{year}-{month:02d}-W{week_num}"
-                    weekly_degs[week_key] += daily_deg
-
-        deg_values = []
-        usage_values = []
-        for week_key in weekly_degs:
-            if week_key in weekly_usage:
-                deg_values.append(weekly_degs[week_key])
-                usage_values.append(weekly_usage[week_key])
-
-        if len(deg_values) < 2:
+        weekly_results = [r for r in self.correlation_results if r["granularity"] == "week" and r["lag"] == 0]
+        if not weekly_results or np.isnan(weekly_results[0]["pearson"]):
             self.correlation_label.setText("⚠️ Insufficient paired data for correlation analysis")
             return
 
-        correlation = np.corrcoef(deg_values, usage_values)[0, 1]
+        correlation = weekly_results[0]["pearson"]
         correlation_text = (
             f"📊 Correlation Analysis:\n"
-            f"Pearson Correlation between Weekly Degradation and Usage Hours: {correlation:.2f}\n"
+            f"Pearson Correlation between Weekly Degradation and Usage Hours: {correlation:.2f} "
+            f"(p={weekly_results[0]['pearson_p']:.3f})\n"
         )
         if correlation > 0.5:
             correlation_text += "Strong positive correlation: Higher usage hours are associated with more degradation.\n"
@@ -708,6 +1554,16 @@ class BatteryReportApp(QMainWindow):
         else:
             correlation_text += "Weak or no correlation: Usage hours and degradation may not be directly related.\n"
 
+        correlation_text += f"\n⏳ Lagged Correlations (usage leading degradation, {CORRELATION_PERMUTATIONS} permutations):\n"
+        for result in self.correlation_results:
+            correlation_text += (
+                f"{result['granularity'].title()} lag {result['lag']}: "
+                f"Pearson {result['pearson']:.2f} (p={result['pearson_p']:.3f}), "
+                f"Spearman {result['spearman']:.2f} (p={result['spearman_p']:.3f}), "
+                f"n={result['pairs']}\n"
+            )
+        correlation_text += "\n"
+
         correlation_text += (
             "🔍 Causation Insights:\n"
             "Correlation does not imply causation. However, possible reasons for the observed relationship:\n"
@@ -718,30 +1574,146 @@ class BatteryReportApp(QMainWindow):
         self.correlation_label.setText(correlation_text)
 
     def update_insights(self):
-        health_data = self.battery_data["health_data"]
-        if not health_data:
+        self.insight_intervals = degradation_intervals(self.battery_data["health_data"])
+        self.insight_candidates = np.array([], dtype=np.int64)
+        if not self.insight_intervals or not len(self.insight_intervals["rate"]):
             self.insights_label.setText("⚠️ No data available")
+            self.show_insights_page(0)
             return
 
-        degradations = []
-        for i in range(1, len(health_data)):
-            degradation = health_data[i - 1]["health"] - health_data[i]["health"]
-            date = health_data[i]["date"].strftime("%Y-%m-%d")
-            degradations.append({"date": date, "degradation": degradation})
+        intervals = self.insight_intervals
+        rates = intervals["rate"]
+        median_rate = np.median(rates)
+        self.insight_candidates = np.flatnonzero(rates > median_rate)
+
+        insights_text = f"💡 Worst {INSIGHTS_TOP_K} intervals by degradation rate:\n"
+        for rank, i in enumerate(top_k_indices(rates, INSIGHTS_TOP_K), start=1):
+            insights_text += (
+                f"{rank}. {intervals['start'][i].strftime('%Y-%m-%d')} to {intervals['end'][i].strftime('%Y-%m-%d')}: "
+                f"{rates[i]:.3f}%/day ({intervals['drop'][i]:.2f}% over {intervals['days'][i]} days)\n"
+            )
+        insights_text += (
+            f"\n📊 {len(self.insight_candidates)} intervals degraded faster than the median "
+            f"({median_rate:.3f}%/day):"
+        )
+        self.insights_label.setText(insights_text)
+        self.show_insights_page(0)
+
+    def show_insights_page(self, page):
+        total = len(self.insight_candidates)
+        page_count = max(1, -(-total // INSIGHTS_PAGE_SIZE))
+        self.insights_page = min(max(page, 0), page_count - 1)
+        self.insights_prev_button.setEnabled(self.insights_page > 0)
+        self.insights_next_button.setEnabled(self.insights_page < page_count - 1)
+        self.insights_page_label.setText(f"Page {self.insights_page + 1} of {page_count}")
+
+        # Only rank as far as the requested page and only render its rows
+        start = self.insights_page * INSIGHTS_PAGE_SIZE
+        end = min(start + INSIGHTS_PAGE_SIZE, total)
+        rows = []
+        if total:
+            rates = self.insight_intervals["rate"]
+            ranked = self.insight_candidates[top_k_indices(rates[self.insight_candidates], end)]
+            rows = ranked[start:end]
+
+        intervals = self.insight_intervals
+        self.insights_table.setRowCount(len(rows))
+        for row, i in enumerate(rows):
+            interval = f"{intervals['start'][i].strftime('%Y-%m-%d')} to {intervals['end'][i].strftime('%Y-%m-%d')}"
+            self.insights_table.setItem(row, 0, QTableWidgetItem(str(start + row + 1)))
+            self.insights_table.setItem(row, 1, QTableWidgetItem(interval))
+            self.insights_table.setItem(row, 2, QTableWidgetItem(str(intervals["days"][i])))
+            self.insights_table.setItem(row, 3, QTableWidgetItem(f"{intervals['drop'][i]:.2f}"))
+            self.insights_table.setItem(row, 4, QTableWidgetItem(f"{intervals['rate'][i]:.3f}"))
+
+    def load_comparison(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Open Battery Reports to Compare", "", "HTML Files (*.html)")
+        if not file_paths:
+            return
 
-        deg_values = [d["degradation"] for d in degradations]
-        median_deg = np.median(deg_values) if deg_values else 0
+        try:
+            reports, errors = load_reports(file_paths)
+        except (OSError, BrokenProcessPool) as e:
+            self.prediction_label.setText(f"⚠️ Error loading reports: {str(e)}")
+            return
+        for file_path, error in errors.items():
+            self.debug_log.append(f"Comparison: failed to load {os.path.basename(file_path)}: {error}")
+        self.debug_label.setText("📋 Debug Log:\n" + "\n".join(self.debug_log))
 
-        high_deg_weeks = [d["date"] for d in degradations if d["degradation"] > median_deg]
+        reports = [(file_path, report) for file_path, report in reports if report["health_data"]]
+        if not reports:
+            self.prediction_label.setText("⚠️ Prediction: No health data in the selected reports")
+            return
 
-        insights_text = f"💡 Weeks with degradation above median ({median_deg:.2f}%):\n"
-        insights_text += "\n".join(high_deg_weeks) if high_deg_weeks else "None"
-        self.insights_label.setText(insights_text)
+        health_series = [report["health_data"] for _, report in reports]
+        days, matrix = align_health_series(health_series)
+        self.comparison = {
+            "labels": [os.path.splitext(os.path.basename(file_path))[0] for file_path, _ in reports],
+            "days": days,
+            "health": matrix,
+            # Fitted on the observed points, like forecast_health in the single-report view
+            "forecasts": linear_forecasts(health_series)
+        }
+        self.update_projections()
+
+    def clear_comparison(self):
+        self.comparison = None
+        self.update_projections()
+
+    def update_comparison_projections(self):
+        labels, days, matrix = self.comparison["labels"], self.comparison["days"], self.comparison["health"]
+        # Plot in timestamps like the single-report view
+        base_timestamp = datetime.fromordinal(int(days[0])).timestamp()
+        timestamps = base_timestamp + (days - days[0]) * 86400.0
+        for row, label in enumerate(labels):
+            self.plot_widget.plot(timestamps, matrix[row], name=label, connect='finite',
+                                  pen=pg.mkPen(pg.intColor(row, hues=len(labels)), width=2))
+
+        try:
+            target = float(self.target_input.text())
+            if not 0 <= target <= 100:
+                raise ValueError("Target health must be between 0 and 100")
+        except ValueError as e:
+            self.prediction_label.setText(f"⚠️ Prediction: Invalid target ({str(e)})")
+            target = None
+
+        if target is not None:
+            slopes, last_days, last_healths = self.comparison["forecasts"]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                target_days = last_days + (last_healths - target) / -slopes
+            degrading = np.flatnonzero((slopes < 0) & (target_days >= date.min.toordinal()) &
+                                       (target_days < date.max.toordinal()))
+            for row in degrading:
+                last_timestamp = base_timestamp + (last_days[row] - days[0]) * 86400.0
+                target_timestamp = base_timestamp + (target_days[row] - days[0]) * 86400.0
+                self.plot_widget.plot([last_timestamp, target_timestamp], [last_healths[row], target],
+                                      pen=pg.mkPen(pg.intColor(row, hues=len(labels)), width=1, style=Qt.DashLine))
+
+            prediction_text = f"🔮 Comparison: {len(labels)} reports, {len(degrading)} degrading"
+            if len(degrading):
+                earliest = degrading[np.argmin(target_days[degrading])]
+                latest = degrading[np.argmax(target_days[degrading])]
+                prediction_text += (
+                    f"\nEarliest to reach {target:.2f}%: {labels[earliest]} on "
+                    f"{date.fromordinal(int(target_days[earliest])).strftime('%Y-%m-%d')}"
+                    f"\nLatest to reach {target:.2f}%: {labels[latest]} on "
+                    f"{date.fromordinal(int(target_days[latest])).strftime('%Y-%m-%d')}"
+                )
+            self.prediction_label.setText(prediction_text)
+
+        tick_indexes = np.unique(np.linspace(0, len(days) - 1, COMPARISON_TICK_COUNT).astype(int))
+        self.plot_widget.getAxis('bottom').setTicks([[
+            (timestamps[i], date.fromordinal(int(days[i])).strftime('%Y-%m-%d')) for i in tick_indexes
+        ]])
 
     def update_projections(self):
         health_data = self.battery_data["health_data"]
         self.plot_widget.clear()
 
+        if self.comparison:
+            self.update_comparison_projections()
+            return
+
         if not health_data:
             self.prediction_label.setText("⚠️ Prediction: No data available")
             return
@@ -758,22 +1730,17 @@ class BatteryReportApp(QMainWindow):
                 raise ValueError("Target health must be between 0 and 100")
 
             if len(health_data) >= 2:
-                X = np.array(timestamps).reshape(-1, 1)
-                y = np.array(healths)
-                model = LinearRegression()
-                model.fit(X, y)
-
                 latest_health = healths[-1]
-                if model.coef_[0] < 0:
-                    days_to_target = (latest_health - target) / (-model.coef_[0] * 86400)
-                    predicted_date = dates[-1] + timedelta(days=days_to_target)
-
+                slope_per_day, predicted_date = forecast_health(health_data, target)
+                if predicted_date:
                     future_timestamp = predicted_date.timestamp()
                     self.plot_widget.plot([timestamps[-1], future_timestamp], [latest_health, target],
                                           pen=pg.mkPen('r', width=2, style=Qt.DashLine))
 
                     self.prediction_label.setText(
                         f"🔮 Prediction: Reach {target:.2f}% on {predicted_date.strftime('%Y-%m-%d')}")
+                elif slope_per_day < 0:
+                    self.prediction_label.setText("🔮 Prediction: Degradation too slow to project a date")
                 else:
                     self.prediction_label.setText("🔮 Prediction: Battery health not degrading")
             else:
@@ -796,16 +1763,96 @@ class BatteryReportApp(QMainWindow):
         )
         self.battery_info_label.setText(info_text)
 
+    def load_catalog(self, file_path=None):
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Open Replacement Catalog", "",
+                                                       "Catalog Files (*.csv *.json)")
+            if not file_path:
+                return False
+
+        try:
+            self.replacement_catalog = ReplacementCatalog.from_file(file_path)
+        except (OSError, ValueError, csv.Error) as e:
+            self.catalog_status_label.setText(f"⚠️ Error loading catalog: {str(e)}")
+            return False
+        self.catalog_status_label.setText(
+            f"📚 Catalog: {len(self.replacement_catalog)} batteries from {os.path.basename(file_path)}")
+        return True
+
+    def ensure_catalog(self):
+        if self.replacement_catalog is not None:
+            return True
+        for file_path in CATALOG_PATHS:
+            if os.path.exists(file_path):
+                return self.load_catalog(file_path)
+        return self.load_catalog()
+
+    def show_replacements(self, batteries, matches):
+        rows = [(battery, entry, score)
+                for battery, battery_matches in zip(batteries, matches)
+                for entry, score in (battery_matches or [(None, 0.0)])]
+        self.replacement_table.setRowCount(len(rows))
+        for i, (battery, entry, score) in enumerate(rows):
+            self.replacement_table.setItem(i, 0, QTableWidgetItem(battery.get("name", "")))
+            if entry is None:
+                self.replacement_table.setItem(i, 1, QTableWidgetItem("-"))
+                self.replacement_table.setItem(i, 2, QTableWidgetItem("No match"))
+                self.replacement_table.setItem(i, 3, QTableWidgetItem("-"))
+                self.replacement_table.setItem(i, 4, QTableWidgetItem(""))
+                continue
+            details = ", ".join(f"{key}: {value}" for key, value in entry.items()
+                                if key not in ("manufacturer", "model") and value)
+            self.replacement_table.setItem(i, 1, QTableWidgetItem(entry.get("manufacturer", "")))
+            self.replacement_table.setItem(i, 2, QTableWidgetItem(entry["model"]))
+            self.replacement_table.setItem(i, 3, QTableWidgetItem(f"{score * 100:.0f}"))
+            self.replacement_table.setItem(i, 4, QTableWidgetItem(details))
+
     def search_replacements(self):
-        model = self.battery_data["installed_batteries"].get("name", "")
-        if model:
-            import webbrowser
-            webbrowser.open(f"https://www.batterylookup.com/search?q={model}")
+        battery = self.battery_data["installed_batteries"]
+        if not battery.get("name"):
+            self.catalog_status_label.setText("⚠️ No battery model to search for")
+            return
+        if not self.ensure_catalog():
+            return
+        self.show_replacements([battery], [self.replacement_catalog.lookup(battery["name"],
+                                                                           battery.get("manufacturer", ""))])
+
+    def fleet_lookup(self):
+        if not self.ensure_catalog():
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Fleet Battery List", "", "CSV Files (*.csv)")
+        if not file_path:
+            return
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                batteries = [{key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                             for row in csv.DictReader(file)]
+        except (OSError, csv.Error) as e:
+            self.catalog_status_label.setText(f"⚠️ Error loading fleet list: {str(e)}")
+            return
+
+        matches = self.replacement_catalog.lookup_many(batteries, limit=1)
+        matched = sum(1 for battery_matches in matches if battery_matches)
+        self.catalog_status_label.setText(f"🚚 Fleet lookup: {matched}/{len(batteries)} batteries matched")
+        self.show_replacements(batteries, matches)
 
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore", category=DeprecationWarning)
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Battery Report Analyzer")
+    parser.add_argument("--serve", action="store_true", help="run the local HTTP/JSON analysis service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-pending", type=int, default=SERVICE_MAX_PENDING)
+    parser.add_argument("--cache-size", type=int, default=SERVICE_CACHE_SIZE)
+    args, qt_args = parser.parse_known_args()
+    if args.serve:
+        serve(args.host, args.port, args.workers, args.max_pending, args.cache_size)
+        sys.exit(0)
+
+    app = QApplication(sys.argv[:1] + qt_args)
     window = BatteryReportApp()
     window.show()
     sys.exit(app.exec_())